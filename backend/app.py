@@ -1,12 +1,21 @@
-from flask import Flask, jsonify
+from cachetools.func import ttl_cache
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from config import Config, DatabaseConfig, init_database
-from routes.auth import auth_bp
+from backend.config import Config, DatabaseConfig, init_database
+from backend.extensions import limiter
+from backend.routes.auth import auth_bp
+from backend.routes.detection import detection_bp, init_detector
+from backend.routes.webrtc import webrtc_bp
 
 
-# Import detection routes (will be created by Person C)
-# from routes.detection import detection_bp
+@ttl_cache(maxsize=1, ttl=5)
+def cached_db_status():
+    """
+    MongoDB ping result, reused for 5 seconds
+    Keeps frequent load balancer health probes from each costing a round-trip
+    """
+    return DatabaseConfig.test_connection()
 
 
 def create_app():
@@ -26,13 +35,25 @@ def create_app():
         r"/api/*": {
             "origins": Config.CORS_ORIGINS,
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization"],
+            "max_age": Config.CORS_MAX_AGE
         }
     })
 
+    @app.after_request
+    def cache_preflight(response):
+        """Allow caches to reuse preflight responses per origin"""
+        if request.method == 'OPTIONS':
+            response.vary.add('Origin')
+            response.headers['Cache-Control'] = f'public, max-age={Config.CORS_MAX_AGE}'
+        return response
+
     # Initialize JWT
     jwt = JWTManager(app)
 
+    # Initialize rate limiting
+    limiter.init_app(app)
+
     # Test database connection
     if not DatabaseConfig.test_connection():
         print("⚠️ Warning: Could not connect to MongoDB. Check your MONGO_URI in .env")
@@ -40,10 +61,13 @@ def create_app():
         # Initialize database (create indexes)
         init_database()
 
+    # Load the face detection graph up front so the first stream doesn't stall
+    init_detector()
+
     # Register Blueprints (route modules)
     app.register_blueprint(auth_bp)
-
-    # app.register_blueprint(detection_bp)  # Uncomment when Person C creates this
+    app.register_blueprint(detection_bp, url_prefix='/api/detection')
+    app.register_blueprint(webrtc_bp, url_prefix='/api/detection')
 
     # Root endpoint
     @app.route('/')
@@ -61,7 +85,7 @@ def create_app():
     # Health check endpoint
     @app.route('/health')
     def health():
-        db_status = DatabaseConfig.test_connection()
+        db_status = cached_db_status()
         return jsonify({
             'status': 'healthy' if db_status else 'unhealthy',
             'database': 'connected' if db_status else 'disconnected'
@@ -97,6 +121,13 @@ def create_app():
             'message': 'Endpoint not found'
         }), 404
 
+    @app.errorhandler(429)
+    def rate_limited(error):
+        return jsonify({
+            'success': False,
+            'message': 'Too many requests, please try again later'
+        }), 429
+
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({
@@ -108,6 +139,9 @@ def create_app():
 
 
 # Run the application
+# Development server only - in production run under Gunicorn from the repo root:
+#   gunicorn -c backend/gunicorn.conf.py "backend.app:create_app()"
+# or locally with: python -m backend.app
 if __name__ == '__main__':
     app = create_app()
 
@@ -0,0 +1,32 @@
+import threading
+from cachetools import TTLCache
+
+# In-process cache of user documents for JWT-protected routes.
+# Keyed by user ID (the JWT identity), entries expire after 60 seconds so
+# stale data is bounded even if an invalidation is missed.
+_user_cache = TTLCache(maxsize=10000, ttl=60)
+
+# TTLCache is not thread-safe and requests are served concurrently
+_lock = threading.Lock()
+
+
+def get_user(user_id):
+    """
+    Get cached user document
+    Returns user document or None on cache miss
+    """
+    with _lock:
+        return _user_cache.get(user_id)
+
+
+def set_user(user_id, user):
+    """Cache user document, without the password hash"""
+    user = {key: value for key, value in user.items() if key != 'password'}
+    with _lock:
+        _user_cache[user_id] = user
+
+
+def invalidate_user(user_id):
+    """Drop cached user document after it changes in the database"""
+    with _lock:
+        _user_cache.pop(user_id, None)
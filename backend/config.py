@@ -8,6 +8,14 @@ from datetime import timedelta
 load_dotenv()
 
 
+def read_key_file(path):
+    """Read a PEM key file, returns None if no path is configured"""
+    if not path:
+        return None
+    with open(path) as key_file:
+        return key_file.read()
+
+
 class Config:
     """
     Configuration class for Flask application
@@ -21,10 +29,19 @@ class Config:
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)  # Token valid for 24 hours
-    JWT_ALGORITHM = 'HS256'
+
+    # Sign tokens with Ed25519 when a keypair is configured - verification no
+    # longer needs the signing secret. Falls back to HS256 with JWT_SECRET_KEY.
+    JWT_PRIVATE_KEY = read_key_file(os.getenv('JWT_PRIVATE_KEY_FILE'))
+    JWT_PUBLIC_KEY = read_key_file(os.getenv('JWT_PUBLIC_KEY_FILE'))
+    JWT_ALGORITHM = 'EdDSA' if JWT_PRIVATE_KEY and JWT_PUBLIC_KEY else 'HS256'
 
     # MongoDB Configuration
     MONGO_URI = os.getenv('MONGO_URI')
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 10))
+    MONGO_MAX_IDLE_TIME_MS = 60000  # Recycle idle connections after a minute
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = 2000  # Fail fast instead of queueing forever when the pool is exhausted
 
     # Application Settings
     PORT = int(os.getenv('PORT', 5000))
@@ -32,6 +49,19 @@ class Config:
 
     # CORS Settings
     CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:5500']  # Add your frontend URLs
+    CORS_MAX_AGE = 86400  # Let browsers cache preflight responses for 24 hours
+
+    # Rate Limiting (Flask-Limiter)
+    # In-process storage by default, set e.g. redis://localhost:6379 to share limits between workers
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    RATELIMIT_STRATEGY = 'moving-window'
+    AUTH_RATE_LIMIT = os.getenv('AUTH_RATE_LIMIT', '10/minute')  # Per IP, on login and register
+    WEBRTC_RATE_LIMIT = os.getenv('WEBRTC_RATE_LIMIT', '5/minute')  # Per IP, each offer starts a video encoder
+
+    # Face Detection
+    # Path to a face_landmarker.task bundle, without one the CPU-only FaceMesh solution is used
+    FACE_LANDMARKER_MODEL = os.getenv('FACE_LANDMARKER_MODEL')
+    FACE_LANDMARKER_GPU = os.getenv('FACE_LANDMARKER_GPU', 'True') == 'True'
 
 
 class DatabaseConfig:
@@ -48,9 +78,19 @@ class DatabaseConfig:
         """
         Singleton pattern to get database instance
         Returns the same database connection throughout the app lifecycle
+
+        The client is created lazily on first use so that each Gunicorn
+        worker builds its own connection pool after forking.
         """
         if cls._db is None:
-            cls._client = MongoClient(Config.MONGO_URI)
+            cls._client = MongoClient(
+                Config.MONGO_URI,
+                maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                retryWrites=True
+            )
             cls._db = cls._client['Facial_Recognition']  # Database name
             print("✅ MongoDB Connected Successfully!")
         return cls._db
@@ -61,6 +101,17 @@ class DatabaseConfig:
         if cls._client:
             cls._client.close()
             print(" MongoDB Connection Closed")
+        cls._client = None
+        cls._db = None
+
+    @classmethod
+    def reset_after_fork(cls):
+        """
+        Forget a client inherited from a parent process
+        MongoClient is not fork-safe, so the child must open its own pool
+        """
+        cls._client = None
+        cls._db = None
 
     @classmethod
     def test_connection(cls):
@@ -80,8 +131,16 @@ def init_database():
     """Initialize database and create indexes"""
     db = DatabaseConfig.get_db()
 
+    # Backfill string IDs for users created before user_id_str existed,
+    # so the unique index below can be built
+    db.users.update_many(
+        {'user_id_str': {'$exists': False}},
+        [{'$set': {'user_id_str': {'$toString': '$_id'}}}]
+    )
+
     # Create indexes for better query performance
     db.users.create_index('email', unique=True)
     db.users.create_index('username', unique=True)
+    db.users.create_index('user_id_str', unique=True)
 
     print("✅ Database indexes created successfully")
\ No newline at end of file
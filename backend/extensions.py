@@ -0,0 +1,6 @@
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+# Rate limiter, keyed by client IP
+# Storage and strategy come from RATELIMIT_* settings in Config
+limiter = Limiter(key_func=get_remote_address)
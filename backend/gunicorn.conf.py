@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for the Facial Tracker API
+
+Run from the repository root:
+    gunicorn -c backend/gunicorn.conf.py "backend.app:create_app()"
+
+Uses threaded (gthread) workers. Every /video_feed subscriber holds its
+connection open for the lifetime of the stream, so with sync workers each
+one would pin a whole worker process; here it only pins one thread.
+
+gevent workers are deliberately not used: the detection pipeline spends
+most of its time in blocking C calls (camera reads, MediaPipe inference,
+JPEG and H.264 encoding) that never yield to gevent's event loop, so a
+single open stream would stall every other request on the worker. With
+real OS threads those calls release the GIL and run alongside auth
+requests, as does bcrypt.
+
+The app stays a WSGI Flask app rather than moving to ASGI (Quart/uvicorn):
+Flask-JWT-Extended, Flask-CORS and Flask-Limiter have no drop-in async
+equivalents, and an async frame generator would still have to push every
+blocking call above onto a thread pool.
+"""
+
+import os
+
+# Server socket
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+
+# Worker processes
+# Keep a single worker by default: the webcam can only be opened by one
+# process at a time, and the shared detection pipeline lives in-process.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+
+# Each open video stream occupies one thread for its whole lifetime,
+# the rest serve auth requests
+threads = int(os.getenv('WORKER_THREADS', 64))
+
+# The worker heartbeats from its own main thread, so long-lived streams
+# don't trip this; it only fires if the worker process is genuinely stuck
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Make sure each worker opens its own MongoDB pool (matters with preload_app)"""
+    from backend.config import DatabaseConfig
+    DatabaseConfig.reset_after_fork()
@@ -1,6 +1,14 @@
 from datetime import datetime
 import bcrypt
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from backend.cache import auth_cache
+
+# bcrypt work factor. 10 keeps login well under 100 ms per hash while still
+# being expensive to brute force; hashes made with the old default (12) still
+# verify because the cost is stored inside each hash.
+BCRYPT_ROUNDS = 10
 
 
 class User:
@@ -22,7 +30,7 @@ class User:
         Hash a plain text password using bcrypt
         Returns hashed password as string
         """
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
@@ -59,7 +67,7 @@ class User:
             email=data.get('email'),
             username=data.get('username'),
             password=data.get('password'),
-            user_id=str(data.get('_id')),
+            user_id=data.get('user_id_str') or str(data.get('_id')),
             created_at=data.get('created_at')
         )
 
@@ -79,21 +87,37 @@ class UserRepository:
         Returns tuple (success: bool, message: str, user_id: str)
         """
         try:
-            # Check if email already exists
-            if self.collection.find_one({'email': email}):
-                return False, "Email already registered", None
-
-            # Check if username already exists
-            if self.collection.find_one({'username': username}):
+            # Check both fields in one round trip before paying for bcrypt
+            existing = self.collection.find_one(
+                {'$or': [{'email': email}, {'username': username}]},
+                {'_id': 0, 'email': 1, 'username': 1}
+            )
+            if existing:
+                if existing.get('email') == email:
+                    return False, "Email already registered", None
                 return False, "Username already taken", None
 
             # Create user object with hashed password
             user = User(email, username, User.hash_password(password))
 
-            # Insert into database
-            result = self.collection.insert_one(user.to_dict())
+            # Store the ID in string form next to the ObjectId, so lookups by
+            # JWT identity don't have to parse it back into an ObjectId
+            object_id = ObjectId()
+            document = user.to_dict()
+            document['_id'] = object_id
+            document['user_id_str'] = str(object_id)
+
+            # Insert into database - the unique indexes on email and username
+            # still catch a concurrent registration that slipped past the check
+            self.collection.insert_one(document)
 
-            return True, "User created successfully", str(result.inserted_id)
+            return True, "User created successfully", document['user_id_str']
+
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get('keyPattern', {})
+            if 'username' in key_pattern:
+                return False, "Username already taken", None
+            return False, "Email already registered", None
 
         except Exception as e:
             return False, f"Error creating user: {str(e)}", None
@@ -118,19 +142,36 @@ class UserRepository:
         Returns user document or None
         """
         try:
-            return self.collection.find_one({'_id': ObjectId(user_id)})
+            user = self.collection.find_one({'user_id_str': user_id})
+            if user:
+                return user
+
+            # Users created before user_id_str existed, if init_database()
+            # couldn't backfill them - store the field now so next time hits the index
+            user = self.collection.find_one({'_id': ObjectId(user_id)})
+            if user:
+                user['user_id_str'] = str(user['_id'])
+                self.collection.update_one(
+                    {'_id': user['_id']},
+                    {'$set': {'user_id_str': user['user_id_str']}}
+                )
+            return user
         except:
             return None
 
+    def _update_by_id(self, user_id, update):
+        """Apply update to user by ID, falling back to _id for users without user_id_str"""
+        result = self.collection.update_one({'user_id_str': user_id}, update)
+        if result.matched_count == 0:
+            self.collection.update_one({'_id': ObjectId(user_id)}, update)
+
     def update_last_login(self, user_id):
         """
         Update user's last login timestamp
         """
         try:
-            self.collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$set': {'last_login': datetime.utcnow()}}
-            )
+            self._update_by_id(user_id, {'$set': {'last_login': datetime.utcnow()}})
+            auth_cache.invalidate_user(user_id)
             return True
         except:
             return False
@@ -140,10 +181,8 @@ class UserRepository:
         Increment detection count when user uses face detection
         """
         try:
-            self.collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$inc': {'detection_count': 1}}
-            )
+            self._update_by_id(user_id, {'$inc': {'detection_count': 1}})
+            auth_cache.invalidate_user(user_id)
             return True
         except:
             return False
@@ -153,21 +192,43 @@ class UserRepository:
         Authenticate user with email and password
         Returns tuple (success: bool, message: str, user_data: dict)
         """
-        user = self.find_by_email(email)
+        # Mongo stores datetimes with millisecond precision - truncate so the
+        # value can be matched exactly if the update has to be undone
+        login_time = datetime.utcnow()
+        login_time = login_time.replace(microsecond=login_time.microsecond // 1000 * 1000)
+
+        # Fetch user and update last login in one round-trip. Most logins
+        # succeed, so the update is undone below on a wrong password instead.
+        # Also fills in user_id_str for users created before it existed.
+        user = self.collection.find_one_and_update(
+            {'email': email},
+            [{'$set': {'last_login': login_time, 'user_id_str': {'$toString': '$_id'}}}],
+            projection={
+                'user_id_str': 1, 'email': 1, 'username': 1,
+                'password': 1, 'created_at': 1, 'last_login': 1
+            },
+            return_document=ReturnDocument.BEFORE
+        )
 
         if not user:
             return False, "Invalid email or password", None
 
         # Verify password
         if not User.verify_password(password, user['password']):
+            # Restore previous last login, unless a newer login has replaced it
+            self.collection.update_one(
+                {'_id': user['_id'], 'last_login': login_time},
+                {'$set': {'last_login': user.get('last_login')}}
+            )
             return False, "Invalid email or password", None
 
-        # Update last login
-        self.update_last_login(str(user['_id']))
+        # Document is from before the update, user_id_str may not be set yet
+        user_id = user.get('user_id_str') or str(user['_id'])
+        auth_cache.invalidate_user(user_id)
 
         # Return user data without password
         user_data = {
-            'id': str(user['_id']),
+            'id': user_id,
             'email': user['email'],
             'username': user['username'],
             'created_at': user['created_at'].isoformat() if user.get('created_at') else None
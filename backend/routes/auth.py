@@ -1,21 +1,44 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from backend.models.user import UserRepository
-from backend.config import DatabaseConfig
+from backend.config import Config, DatabaseConfig
+from backend.extensions import limiter
+from backend.cache import auth_cache
 import re
 
 # Create Blueprint for authentication routes
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
-# Get database instance
-db = DatabaseConfig.get_db()
-user_repo = UserRepository(db)
+# Compiled once at import instead of on every registration
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z', re.ASCII)
+
+
+def get_user_repo():
+    """
+    Get user repository for the current request
+    The database is only touched on first request, not at import time
+    """
+    if 'user_repo' not in g:
+        g.user_repo = UserRepository(DatabaseConfig.get_db())
+    return g.user_repo
+
+
+def get_cached_user(user_id):
+    """
+    Get user by ID, serving from the auth cache when possible
+    Returns user document or None
+    """
+    user = auth_cache.get_user(user_id)
+    if user is None:
+        user = get_user_repo().find_by_id(user_id)
+        if user:
+            auth_cache.set_user(user_id, user)
+    return user
 
 
 def validate_email(email):
     """Validate email format using regex"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
 
 
 def validate_password(password):
@@ -26,16 +49,25 @@ def validate_password(password):
     if len(password) < 6:
         return False, "Password must be at least 6 characters long"
 
-    if not any(char.isdigit() for char in password):
+    # Check both character classes in a single pass, stopping early once found
+    has_digit = has_alpha = False
+    for char in password:
+        has_digit = has_digit or char.isdigit()
+        has_alpha = has_alpha or char.isalpha()
+        if has_digit and has_alpha:
+            break
+
+    if not has_digit:
         return False, "Password must contain at least one number"
 
-    if not any(char.isalpha() for char in password):
+    if not has_alpha:
         return False, "Password must contain at least one letter"
 
     return True, "Valid"
 
 
 @auth_bp.route('/register', methods=['POST'])
+@limiter.limit(Config.AUTH_RATE_LIMIT)
 def register():
     """
     Register a new user
@@ -99,7 +131,7 @@ def register():
             }), 400
 
         # Create user in database
-        success, message, user_id = user_repo.create_user(email, username, password)
+        success, message, user_id = get_user_repo().create_user(email, username, password)
 
         if success:
             return jsonify({
@@ -121,6 +153,7 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@limiter.limit(Config.AUTH_RATE_LIMIT)
 def login():
     """
     Login user and return JWT token
@@ -158,7 +191,7 @@ def login():
             }), 400
 
         # Authenticate user
-        success, message, user_data = user_repo.authenticate(email, password)
+        success, message, user_data = get_user_repo().authenticate(email, password)
 
         if success:
             # Create JWT token
@@ -204,7 +237,7 @@ def verify_token():
         current_user_id = get_jwt_identity()
 
         # Fetch user data
-        user = user_repo.find_by_id(current_user_id)
+        user = get_cached_user(current_user_id)
 
         if not user:
             return jsonify({
@@ -215,7 +248,7 @@ def verify_token():
         return jsonify({
             'success': True,
             'user': {
-                'id': str(user['_id']),
+                'id': user['user_id_str'],
                 'email': user['email'],
                 'username': user['username']
             }
@@ -239,7 +272,7 @@ def get_profile():
     """
     try:
         current_user_id = get_jwt_identity()
-        user = user_repo.find_by_id(current_user_id)
+        user = get_cached_user(current_user_id)
 
         if not user:
             return jsonify({
@@ -250,7 +283,7 @@ def get_profile():
         return jsonify({
             'success': True,
             'user': {
-                'id': str(user['_id']),
+                'id': user['user_id_str'],
                 'email': user['email'],
                 'username': user['username'],
                 'created_at': user['created_at'].isoformat() if user.get('created_at') else None,
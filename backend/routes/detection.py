@@ -1,74 +1,317 @@
-from flask import Blueprint, Response, jsonify
-import cv2
+from flask import Blueprint, Response, jsonify, request
 import sys
-import os
+import threading
+import time
+import cv2
+from backend.routes.main import FaceDetector
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from __main__ import FaceDetector
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    # PyTurboJPEG or the libjpeg-turbo shared library isn't installed
+    _turbo_jpeg = None
 
-detection_bp = Blueprint('detection', __name__)
+JPEG_QUALITY = 80
 
-# Global detector instance
-detector = None
-camera = None
+# Camera capture settings
+CAMERA_WIDTH = 640
+CAMERA_HEIGHT = 480
+CAMERA_FPS = 30
 
+detection_bp = Blueprint('detection', __name__)
 
-def get_detector():
-    """Get or create face detector instance"""
-    global detector
-    if detector is None:
-        detector = FaceDetector()
-    return detector
+# One detector per camera device, shared by every stream of that camera.
+# Detectors carry per-camera tracking and calibration state, so cameras
+# never share one. The default camera's is built by init_detector() at app
+# start-up so the first frame doesn't pay for it.
+detectors = {}
 
 
-def get_camera():
-    """Get or create camera instance"""
-    global camera
-    if camera is None or not camera.isOpened():
-        camera = cv2.VideoCapture(0)
+def open_camera(device):
+    """
+    Open a camera with a fixed capture format
+    MJPG transport keeps USB bandwidth low at 30 FPS, and a 1-frame buffer
+    means read() returns the newest frame instead of a queued stale one
+    """
+    backend = cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY
+    camera = cv2.VideoCapture(device, backend)
+    camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+    camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+    camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     return camera
 
 
-def generate_frames():
-    """Generate video frames with face detection"""
-    face_detector = get_detector()
-    cap = get_camera()
+# Running frame sources keyed by camera device index
+frame_sources = {}
+frame_sources_lock = threading.RLock()
+
+# Release a camera after it has had no subscribers for this many seconds.
+# Long enough that a page reload picks the running source back up.
+SOURCE_IDLE_TIMEOUT = 10
+
+
+class FrameSource:
+    """
+    Reads one camera in a background thread, runs face detection once per
+    frame and hands the latest result to every subscribed stream.
+    Subscribers that fall behind skip straight to the newest frame.
+    """
+
+    def __init__(self, device, face_detector):
+        self.device = device
+        self.detector = face_detector
+        self.camera = None
+        self.thread = None
+        self.running = False
+        self.idle_since = time.monotonic()
+
+        # Subscriber counts keyed by whether they want the face mesh drawn
+        self.subscribers = {True: 0, False: 0}
+
+        # Latest published frame: sequence number and annotated frames keyed
+        # by draw_mesh, rendered only for variants someone is subscribed to
+        self.seq = 0
+        self.frames = {}
+        self.condition = threading.Condition()
+
+    def start(self):
+        """
+        Open the camera and start the capture loop
+        Returns True if the camera could be opened
+        """
+        # A stopped loop releases its camera on the way out - wait for it,
+        # otherwise the device is still busy and reopening it fails
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+        self.camera = open_camera(self.device)
+        if not self.camera.isOpened():
+            self.camera.release()
+            return False
+
+        self.running = True
+        self.idle_since = time.monotonic()
+        self.thread = threading.Thread(target=self._run, args=(self.camera,), daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop capture loop and wake waiting subscribers (the loop releases the camera)"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def is_active(self):
+        return self.running and self.camera is not None and self.camera.isOpened()
+
+    def has_subscribers(self):
+        return any(self.subscribers.values())
+
+    def _stop_if_idle(self):
+        """Stop once nobody has subscribed for SOURCE_IDLE_TIMEOUT, returns True if stopped"""
+        if self.has_subscribers() or time.monotonic() - self.idle_since < SOURCE_IDLE_TIMEOUT:
+            return False
+
+        # New subscribers join under frame_sources_lock, so none can slip in
+        # between this check and stopping. Don't block on it: whoever holds
+        # it may be restarting this source and waiting for the loop to exit.
+        if not frame_sources_lock.acquire(blocking=False):
+            return False
+        try:
+            if self.has_subscribers():
+                return False
+            self.stop()
+            return True
+        finally:
+            frame_sources_lock.release()
+
+    def _run(self, camera):
+        try:
+            # A restart hands the source a new camera - an old loop that
+            # outlived the join in start() must not keep running alongside it
+            while self.running and camera is self.camera:
+                if not self.has_subscribers():
+                    # Nobody is watching - skip capture and inference
+                    if self._stop_if_idle():
+                        break
+                    time.sleep(0.1)
+                    continue
+
+                success, frame = camera.read()
+                if not success:
+                    break
+
+                # Inference runs once, then each wanted variant is annotated
+                direction, points = self.detector.detect(frame)
+
+                variants = [draw_mesh for draw_mesh, count in self.subscribers.items() if count]
+                frames = {}
+                for i, draw_mesh in enumerate(variants):
+                    # The last variant can be drawn on the captured frame itself
+                    target = frame if i == len(variants) - 1 else frame.copy()
+                    frames[draw_mesh] = self.detector.annotate(target, direction, points, draw_mesh)
+
+                with self.condition:
+                    if camera is not self.camera:
+                        # Restarted while this frame was captured - drop it
+                        break
+                    self.seq += 1
+                    self.frames = frames
+                    self.condition.notify_all()
+        finally:
+            if camera is self.camera:
+                self.stop()
+            camera.release()
+
+    def subscribe(self, draw_mesh):
+        with self.condition:
+            self.subscribers[draw_mesh] += 1
 
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
+    def unsubscribe(self, draw_mesh):
+        """Drop a subscriber, the camera is released once it stays idle"""
+        with self.condition:
+            self.subscribers[draw_mesh] -= 1
+            if not self.has_subscribers():
+                self.idle_since = time.monotonic()
 
-        # Detect movement
-        direction, annotated_frame = face_detector.detect_movement(frame)
+    def wait_frame(self, last_seq, timeout=5.0):
+        """
+        Wait for a frame newer than last_seq
+        Returns (seq, frames keyed by draw_mesh), or None once the source has stopped
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq != last_seq or not self.running, timeout)
+            if not self.running or self.seq == last_seq:
+                return None
+            return self.seq, self.frames
 
-        # Encode frame to JPEG
-        ret, buffer = cv2.imencode('.jpg', annotated_frame)
-        frame_bytes = buffer.tobytes()
 
-        # Yield frame in multipart format
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+def init_detector(device=0):
+    """Create the face detector for a camera device"""
+    with frame_sources_lock:
+        if device not in detectors:
+            detectors[device] = FaceDetector()
+        return detectors[device]
+
+
+def get_detector(device=0):
+    """Get face detector for a camera device"""
+    return init_detector(device)
+
+
+def get_frame_source(device=0):
+    """Get frame source for a camera, (re)starting its capture loop if needed"""
+    with frame_sources_lock:
+        source = frame_sources.get(device)
+        if source is None:
+            source = FrameSource(device, get_detector(device))
+            frame_sources[device] = source
+        if not source.running:
+            source.start()
+        return source
+
+
+def stop_frame_sources():
+    """Stop every running frame source and release the cameras"""
+    with frame_sources_lock:
+        for source in frame_sources.values():
+            source.stop()
+
+
+class FrameSubscription:
+    """One client's view of the shared frame source for a camera"""
+
+    def __init__(self, draw_mesh=True, device=0):
+        self.draw_mesh = bool(draw_mesh)
+        # Subscribe under the lock so the source can't be stopped in between
+        with frame_sources_lock:
+            self.source = get_frame_source(device)
+            self.source.subscribe(self.draw_mesh)
+        self.seq = 0
+        self.closed = False
+
+    def next_frame(self):
+        """
+        Wait for the next annotated frame
+        Returns BGR frame, or None once detection has stopped
+        """
+        while True:
+            latest = self.source.wait_frame(self.seq)
+            if latest is None:
+                return None
+
+            # A frame captured before we subscribed may lack our variant,
+            # the next one will have it
+            self.seq, frames = latest
+            if self.draw_mesh in frames:
+                return frames[self.draw_mesh]
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.source.unsubscribe(self.draw_mesh)
+
+
+def encode_jpeg(frame):
+    """
+    Encode a BGR frame to JPEG bytes
+    Uses libjpeg-turbo's SIMD encoder when available, OpenCV otherwise
+    """
+    if _turbo_jpeg is not None:
+        return _turbo_jpeg.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR)
+
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    return buffer.tobytes()
+
+
+def generate_frames(draw_mesh=True):
+    """Generate video frames with face detection"""
+    subscription = FrameSubscription(draw_mesh)
+    try:
+        while True:
+            annotated_frame = subscription.next_frame()
+            if annotated_frame is None:
+                break
+
+            # Encode frame to JPEG
+            frame_bytes = encode_jpeg(annotated_frame)
+
+            # Yield frame in multipart format
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    finally:
+        subscription.close()
 
 
 @detection_bp.route('/video_feed')
 def video_feed():
-    """Video streaming route"""
+    """
+    Video streaming route (MJPEG)
+    Pass ?draw=0 to stream frames without the face mesh overlay
+    Prefer /webrtc/offer where the client supports WebRTC - it streams
+    H.264 at a fraction of the bandwidth.
+    """
+    draw_mesh = request.args.get('draw', '1') != '0'
     return Response(
-        generate_frames(),
+        generate_frames(draw_mesh),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
 
 @detection_bp.route('/start')
 def start_detection():
-    """Start detection session"""
+    """
+    Start detection session
+    Opens the camera; frames are only processed once a stream subscribes,
+    and the camera is released again if none does within SOURCE_IDLE_TIMEOUT
+    """
     try:
-        face_detector = get_detector()
-        cap = get_camera()
+        source = get_frame_source()
 
-        if cap.isOpened():
+        if source.is_active():
             return jsonify({
                 "status": "success",
                 "message": "Detection started"
@@ -88,16 +331,12 @@ def start_detection():
 @detection_bp.route('/stop')
 def stop_detection():
     """Stop detection and release camera"""
-    global camera, detector
-
     try:
-        if camera is not None:
-            camera.release()
-            camera = None
-
-        if detector is not None:
-            detector.release()
-            detector = None
+        # Open streams end; detectors stay loaded for the next session
+        stop_frame_sources()
+        with frame_sources_lock:
+            for face_detector in detectors.values():
+                face_detector.recalibrate()
 
         return jsonify({
             "status": "success",
@@ -114,8 +353,9 @@ def stop_detection():
 def recalibrate():
     """Recalibrate face detection"""
     try:
-        face_detector = get_detector()
-        face_detector.recalibrate()
+        with frame_sources_lock:
+            for face_detector in detectors.values():
+                face_detector.recalibrate()
 
         return jsonify({
             "status": "success",
@@ -131,9 +371,8 @@ def recalibrate():
 @detection_bp.route('/status')
 def detection_status():
     """Check detection status"""
-    global camera
-
-    is_active = camera is not None and camera.isOpened()
+    with frame_sources_lock:
+        is_active = any(source.is_active() for source in frame_sources.values())
 
     return jsonify({
         "active": is_active,
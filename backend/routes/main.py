@@ -1,129 +1,226 @@
+import threading
+import time
 import cv2
 import mediapipe as mp
 import numpy as np
+from mediapipe.tasks.python import BaseOptions
+from mediapipe.tasks.python import vision
+from backend.config import Config
+
+# Key landmark indices
+NOSE_TIP = 1
+LEFT_EYE = 33
+RIGHT_EYE = 263
+CHIN = 152
+FOREHEAD = 10
+
+# Movement labels indexed by [dominant axis][displacement is positive]
+DIRECTIONS = (("LEFT", "RIGHT"), ("UP", "DOWN"))
+CALIBRATED = "CENTER (Calibrated)"
 
 
 class FaceDetector:
-    def __init__(self):
-        # Initialize MediaPipe Face Mesh
+    def __init__(self, model_path=None, use_gpu=None):
+        """
+        model_path: path to a face_landmarker.task bundle. When given (or set via
+        Config.FACE_LANDMARKER_MODEL) inference runs through the MediaPipe Tasks API,
+        on the GPU delegate unless use_gpu is False / Config.FACE_LANDMARKER_GPU is False.
+        Without a model bundle the legacy CPU-only FaceMesh solution is used.
+        """
+        model_path = model_path or Config.FACE_LANDMARKER_MODEL
+        if use_gpu is None:
+            use_gpu = Config.FACE_LANDMARKER_GPU
+
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.drawing_spec = self.mp_drawing.DrawingSpec(thickness=1, circle_radius=1)
+        self.face_mesh = None
+        self.landmarker = None
+        self._last_timestamp_ms = 0
+
+        # RGB conversion target, reused across frames of the same size
+        self._rgb_buffer = None
+
+        # MediaPipe graphs are not thread-safe, serialize inference
+        self._lock = threading.Lock()
+
+        if model_path:
+            self.landmarker = self._create_landmarker(model_path, use_gpu)
+        else:
+            # Initialize MediaPipe Face Mesh
+            self.face_mesh = self.mp_face_mesh.FaceMesh(
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+
+        # Mesh edges as (start, end) landmark index pairs, so the whole mesh
+        # can be drawn with a single cv2.polylines call
+        self.tesselation = np.array(list(self.mp_face_mesh.FACEMESH_TESSELATION), dtype=np.int32)
 
         # Reference points for head position
         self.reference_nose_tip = None
         self.calibrated = False
 
-    def detect_movement(self, frame):
+    @staticmethod
+    def _create_landmarker(model_path, use_gpu):
+        """Create a Tasks API FaceLandmarker, falling back to CPU if the GPU delegate fails"""
+        delegates = [BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU] if use_gpu else [BaseOptions.Delegate.CPU]
+
+        for delegate in delegates:
+            options = vision.FaceLandmarkerOptions(
+                base_options=BaseOptions(model_asset_path=model_path, delegate=delegate),
+                running_mode=vision.RunningMode.VIDEO,
+                num_faces=1,
+                min_face_detection_confidence=0.5,
+                min_face_presence_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            try:
+                return vision.FaceLandmarker.create_from_options(options)
+            except RuntimeError as e:
+                if delegate == delegates[-1]:
+                    raise
+                print(f"GPU delegate unavailable, falling back to CPU: {str(e)}")
+
+    def _process(self, rgb_frame):
         """
-        Detect facial landmarks and determine head movement direction
-        Returns: direction (LEFT, RIGHT, UP, DOWN, CENTER) and annotated frame
+        Run landmark inference on an RGB frame
+        Returns landmarks of the first face (sequence of normalized landmarks) or None
+        """
+        if self.landmarker is None:
+            results = self.face_mesh.process(rgb_frame)
+            if not results.multi_face_landmarks:
+                return None
+            return results.multi_face_landmarks[0].landmark
+
+        # VIDEO mode needs strictly increasing timestamps
+        timestamp_ms = max(int(time.monotonic() * 1000), self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        result = self.landmarker.detect_for_video(image, timestamp_ms)
+        if not result.face_landmarks:
+            return None
+        return result.face_landmarks[0]
+
+    @staticmethod
+    def landmarks_to_pixels(face_landmarks, w, h):
+        """
+        Convert normalized landmarks to pixel coordinates in one vectorized step
+        Returns int32 array of shape (num_landmarks, 2) holding (x, y)
         """
+        normalized = np.array([(lm.x, lm.y) for lm in face_landmarks], dtype=np.float32)
+        return (normalized * np.array([w, h], dtype=np.float32)).astype(np.int32)
 
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def draw_mesh(self, frame, points):
+        """Draw the face mesh for landmark pixel coordinates onto frame"""
+        cv2.polylines(frame, points[self.tesselation], False, (0, 255, 0), 1)
 
-        # Process the frame
-        results = self.face_mesh.process(rgb_frame)
+    def detect(self, frame):
+        """
+        Detect facial landmarks and determine head movement direction
+        Returns: direction (LEFT, RIGHT, UP, DOWN, CENTER) and landmark pixel
+        coordinates (int32 array of shape (num_landmarks, 2), None if no face)
+        """
+        with self._lock:
+            # Convert BGR to RGB into the preallocated buffer instead of a new array per frame
+            if self._rgb_buffer is None or self._rgb_buffer.shape != frame.shape:
+                self._rgb_buffer = np.empty_like(frame)
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
 
-        direction = "NO FACE"
+            # Process the frame
+            face_landmarks = self._process(rgb_frame)
 
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0]
+            if face_landmarks is None:
+                return "NO FACE", None
 
             # Get image dimensions
             h, w, c = frame.shape
 
-            # Key landmark indices
-            # Nose tip: 1
-            # Left eye: 33
-            # Right eye: 263
-            # Chin: 152
-            # Forehead: 10
-
-            nose_tip = face_landmarks.landmark[1]
-            nose_x = int(nose_tip.x * w)
-            nose_y = int(nose_tip.y * h)
-
-            # Draw landmarks on face
-            self.mp_drawing.draw_landmarks(
-                image=frame,
-                landmark_list=face_landmarks,
-                connections=self.mp_face_mesh.FACEMESH_TESSELATION,
-                landmark_drawing_spec=None,
-                connection_drawing_spec=self.mp_drawing.DrawingSpec(
-                    color=(0, 255, 0), thickness=1, circle_radius=1
-                )
-            )
+            # Pixel coordinates of every landmark, one row per landmark
+            points = self.landmarks_to_pixels(face_landmarks, w, h)
 
             # Calibrate on first detection or recalibrate
             if not self.calibrated or self.reference_nose_tip is None:
-                self.reference_nose_tip = (nose_x, nose_y)
+                self.reference_nose_tip = tuple(points[NOSE_TIP].tolist())
                 self.calibrated = True
-                direction = "CENTER (Calibrated)"
-            else:
-                # Calculate displacement from reference
-                dx = nose_x - self.reference_nose_tip[0]
-                dy = nose_y - self.reference_nose_tip[1]
-
-                # Thresholds for movement detection
-                horizontal_threshold = w * 0.05  # 5% of width
-                vertical_threshold = h * 0.05  # 5% of height
-
-                # Determine direction
-                if abs(dx) > horizontal_threshold or abs(dy) > vertical_threshold:
-                    if abs(dx) > abs(dy):
-                        # Horizontal movement is dominant
-                        if dx > horizontal_threshold:
-                            direction = "RIGHT"
-                        elif dx < -horizontal_threshold:
-                            direction = "LEFT"
-                    else:
-                        # Vertical movement is dominant
-                        if dy > vertical_threshold:
-                            direction = "DOWN"
-                        elif dy < -vertical_threshold:
-                            direction = "UP"
-                else:
-                    direction = "CENTER"
-
-                # Draw reference point
-                cv2.circle(frame, self.reference_nose_tip, 5, (255, 0, 0), -1)
-
-                # Draw current nose position
-                cv2.circle(frame, (nose_x, nose_y), 5, (0, 0, 255), -1)
-
-                # Draw line between reference and current
-                cv2.line(frame, self.reference_nose_tip, (nose_x, nose_y), (255, 255, 0), 2)
-
-            # Display direction on frame
-            cv2.putText(frame, f"Direction: {direction}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-            # Display instructions
-            cv2.putText(frame, "Press 'C' to recalibrate", (10, h - 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                return CALIBRATED, points
 
-        else:
+            # Calculate displacement (dx, dy) from reference
+            displacement = points[NOSE_TIP] - self.reference_nose_tip
+            magnitude = np.abs(displacement)
+
+            # Thresholds for movement detection: 5% of width / height
+            thresholds = np.array([w, h]) * 0.05
+
+            # Determine direction along the dominant axis (ties count as vertical)
+            axis = int(magnitude[1] >= magnitude[0])
+            if magnitude[axis] > thresholds[axis]:
+                return DIRECTIONS[axis][int(displacement[axis] > 0)], points
+            return "CENTER", points
+
+    def annotate(self, frame, direction, points, draw_mesh=True):
+        """
+        Draw detection results from detect() onto frame
+        Set draw_mesh=False to skip the face mesh overlay
+        Returns the annotated frame
+        """
+        if points is None:
             cv2.putText(frame, "No face detected", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            return frame
+
+        h, w, c = frame.shape
+
+        # Draw face mesh first so the markers stay visible on top of it
+        if draw_mesh:
+            self.draw_mesh(frame, points)
+
+        reference = self.reference_nose_tip
+        if direction != CALIBRATED and reference is not None:
+            nose_tip = tuple(points[NOSE_TIP].tolist())
+
+            # Draw reference point
+            cv2.circle(frame, reference, 5, (255, 0, 0), -1)
+
+            # Draw current nose position
+            cv2.circle(frame, nose_tip, 5, (0, 0, 255), -1)
 
-        return direction, frame
+            # Draw line between reference and current
+            cv2.line(frame, reference, nose_tip, (255, 255, 0), 2)
+
+        # Display direction on frame
+        cv2.putText(frame, f"Direction: {direction}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+        # Display instructions
+        cv2.putText(frame, "Press 'C' to recalibrate", (10, h - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        return frame
+
+    def detect_movement(self, frame, draw_mesh=True):
+        """
+        Detect head movement direction and annotate frame in place
+        Set draw_mesh=False to skip the face mesh overlay
+        Returns: direction, annotated frame and landmark pixel coordinates (None if no face)
+        """
+        direction, points = self.detect(frame)
+        self.annotate(frame, direction, points, draw_mesh)
+        return direction, frame, points
 
     def recalibrate(self):
         """Reset calibration"""
-        self.reference_nose_tip = None
-        self.calibrated = False
+        with self._lock:
+            self.reference_nose_tip = None
+            self.calibrated = False
 
     def release(self):
         """Release resources"""
-        self.face_mesh.close()
+        if self.landmarker is not None:
+            self.landmarker.close()
+        else:
+            self.face_mesh.close()
 
 
 # Standalone test function
@@ -141,7 +238,7 @@ def test_camera():
             break
 
         # Detect movement
-        direction, annotated_frame = detector.detect_movement(frame)
+        direction, annotated_frame, points = detector.detect_movement(frame)
 
         # Display
         cv2.imshow('Facial Movement Detection', annotated_frame)
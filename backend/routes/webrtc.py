@@ -0,0 +1,183 @@
+import asyncio
+import concurrent.futures
+import threading
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from aiortc import RTCPeerConnection, RTCRtpSender, RTCSessionDescription, VideoStreamTrack
+from aiortc.mediastreams import MediaStreamError
+from av import VideoFrame
+from backend.config import Config
+from backend.extensions import limiter
+from backend.routes.detection import FrameSubscription
+
+webrtc_bp = Blueprint('webrtc', __name__)
+
+# aiortc is asyncio based, so peer connections live on a dedicated event
+# loop running in a background thread. Flask handlers hand work to it with
+# run_coroutine_threadsafe.
+_loop = None
+_loop_lock = threading.Lock()
+_peer_connections = set()
+
+# How long to wait for ICE gathering / answer creation
+OFFER_TIMEOUT = 10
+
+
+def get_loop():
+    """Get or start the event loop that runs WebRTC peer connections"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+    return _loop
+
+
+class DetectionTrack(VideoStreamTrack):
+    """
+    Video track that streams annotated face detection frames
+    aiortc encodes them with H.264/VP8 instead of sending a JPEG per frame
+    """
+
+    def __init__(self, draw_mesh=True):
+        super().__init__()
+        self.draw_mesh = draw_mesh
+
+        # Only subscribe once media actually flows, so a negotiation that
+        # never connects doesn't keep the camera running
+        self.subscription = None
+
+    async def recv(self):
+        if self.readyState != 'live':
+            raise MediaStreamError
+
+        loop = asyncio.get_running_loop()
+        if self.subscription is None:
+            # Subscribing may open the camera, keep it off the event loop
+            subscription = await loop.run_in_executor(None, FrameSubscription, self.draw_mesh)
+            if self.readyState != 'live':
+                # Stopped while the camera was opening
+                subscription.close()
+                raise MediaStreamError
+            self.subscription = subscription
+
+        pts, time_base = await self.next_timestamp()
+
+        # Waiting for the next frame blocks, keep it off the event loop
+        frame = await loop.run_in_executor(None, self.subscription.next_frame)
+        if frame is None:
+            raise MediaStreamError
+
+        video_frame = VideoFrame.from_ndarray(frame, format='bgr24')
+        video_frame.pts = pts
+        video_frame.time_base = time_base
+        return video_frame
+
+    def stop(self):
+        super().stop()
+        if self.subscription is not None:
+            self.subscription.close()
+
+
+async def close_peer_connection(pc):
+    """Close a peer connection, stop its tracks and stop tracking it"""
+    _peer_connections.discard(pc)
+
+    # pc.close() doesn't stop local tracks - aiortc only does that once RTP
+    # has been flowing - so release their camera subscriptions explicitly
+    for sender in pc.getSenders():
+        if sender.track is not None:
+            sender.track.stop()
+
+    await pc.close()
+
+
+async def create_answer(sdp, sdp_type, draw_mesh):
+    """Create a peer connection streaming the detection track and answer the client's offer"""
+    pc = RTCPeerConnection()
+    _peer_connections.add(pc)
+
+    @pc.on('connectionstatechange')
+    async def on_connection_state_change():
+        if pc.connectionState in ('failed', 'closed'):
+            await close_peer_connection(pc)
+
+    try:
+        transceiver = pc.addTransceiver(DetectionTrack(draw_mesh), direction='sendonly')
+
+        # Prefer H.264 - browsers can decode it in hardware
+        codecs = RTCRtpSender.getCapabilities('video').codecs
+        h264 = [codec for codec in codecs if codec.mimeType == 'video/H264']
+        if h264:
+            transceiver.setCodecPreferences(h264)
+
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type=sdp_type))
+        await pc.setLocalDescription(await pc.createAnswer())
+        return pc.localDescription
+    except BaseException:
+        # Bad offer, or cancelled because the request timed out
+        await close_peer_connection(pc)
+        raise
+
+
+@webrtc_bp.route('/webrtc/offer', methods=['POST'])
+@jwt_required()
+@limiter.limit(Config.WEBRTC_RATE_LIMIT)
+def offer():
+    """
+    WebRTC signaling - exchange SDP offer for answer
+    Protected route - requires valid JWT token in headers
+
+    Expected JSON (from RTCPeerConnection.createOffer() with a recvonly video transceiver):
+    {
+        "sdp": "...",
+        "type": "offer",
+        "draw": true
+    }
+
+    Returns:
+    {
+        "sdp": "...",
+        "type": "answer"
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data or not data.get('sdp') or data.get('type') != 'offer':
+            return jsonify({
+                "status": "error",
+                "message": "SDP offer is required"
+            }), 400
+
+        draw_mesh = data.get('draw', True)
+        if not isinstance(draw_mesh, bool):
+            return jsonify({
+                "status": "error",
+                "message": "draw must be true or false"
+            }), 400
+
+        future = asyncio.run_coroutine_threadsafe(
+            create_answer(data['sdp'], data['type'], draw_mesh),
+            get_loop()
+        )
+        try:
+            answer = future.result(timeout=OFFER_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # Cancelling the task makes create_answer close the peer connection
+            future.cancel()
+            return jsonify({
+                "status": "error",
+                "message": "Timed out creating WebRTC answer"
+            }), 504
+
+        return jsonify({
+            "sdp": answer.sdp,
+            "type": answer.type
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
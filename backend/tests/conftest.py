@@ -0,0 +1,105 @@
+import threading
+import numpy as np
+import pytest
+from backend.routes import detection
+
+
+class FakeCamera:
+    """
+    Stands in for cv2.VideoCapture
+    Every read() consumes one frame allowed by allow(), and blocks until one is
+    (or fails after read_timeout) - so tests control exactly when frames arrive
+    """
+
+    def __init__(self, free_running=False, read_timeout=5.0):
+        self.free_running = free_running
+        self.read_timeout = read_timeout
+        self.opened = True
+        self.released = False
+        self.reads = 0
+        self.waiting = False
+        self._allowed = 0
+        self._condition = threading.Condition()
+
+    def allow(self, frames=1):
+        with self._condition:
+            self._allowed += frames
+            self._condition.notify_all()
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        with self._condition:
+            if self.free_running:
+                self._condition.wait(0.01)
+            else:
+                self.waiting = True
+                allowed = self._condition.wait_for(lambda: self._allowed > 0, self.read_timeout)
+                self.waiting = False
+                if not allowed:
+                    return False, None
+                self._allowed -= 1
+            self.reads += 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def release(self):
+        self.opened = False
+        self.released = True
+
+
+class FakeDetector:
+    """
+    Stands in for FaceDetector
+    Annotated frames are white with the mesh and black without, so tests can
+    tell the variants apart
+    """
+
+    def __init__(self):
+        self.detections = 0
+        self.recalibrations = 0
+
+    def detect(self, frame):
+        self.detections += 1
+        return "CENTER", None
+
+    def annotate(self, frame, direction, points, draw_mesh=True):
+        frame[:] = 255 if draw_mesh else 0
+        return frame
+
+    def recalibrate(self):
+        self.recalibrations += 1
+
+
+class CameraList(list):
+    free_running = False
+
+
+@pytest.fixture
+def cameras(monkeypatch):
+    """
+    Fresh detection module state with fake cameras
+    Returns the list of cameras opened so far; set cameras.free_running
+    to have new ones deliver frames without allow()
+    """
+    opened = CameraList()
+
+    def open_camera(device):
+        camera = FakeCamera(free_running=opened.free_running)
+        opened.append(camera)
+        return camera
+
+    monkeypatch.setattr(detection, 'open_camera', open_camera)
+    monkeypatch.setattr(detection, 'frame_sources', {})
+    monkeypatch.setattr(detection, 'detectors', {0: FakeDetector()})
+
+    yield opened
+
+    # Let every capture loop run to its exit so no thread outlives the test
+    detection.stop_frame_sources()
+    for camera in opened:
+        camera.allow(100)
+    for source in detection.frame_sources.values():
+        if source.thread is not None:
+            source.thread.join(timeout=5.0)
+
@@ -0,0 +1,135 @@
+import threading
+import time
+from flask import Flask
+from backend.routes import detection
+from backend.routes.detection import FrameSubscription, detection_bp
+
+
+def wait_until(predicate, timeout=5.0):
+    """Poll until predicate() is true, returns its final value"""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_subscribe_and_unsubscribe_counts(cameras):
+    with_mesh = FrameSubscription(True)
+    without_mesh = FrameSubscription(None)
+    also_with_mesh = FrameSubscription("false")  # Any truthy value draws the mesh
+
+    source = with_mesh.source
+    assert source is without_mesh.source is also_with_mesh.source
+    assert source.subscribers == {True: 2, False: 1}
+    assert len(cameras) == 1
+
+    with_mesh.close()
+    with_mesh.close()  # Closing twice only unsubscribes once
+    assert source.subscribers == {True: 1, False: 1}
+
+    without_mesh.close()
+    also_with_mesh.close()
+    assert source.subscribers == {True: 0, False: 0}
+    assert not source.has_subscribers()
+
+
+def test_idle_source_releases_camera(cameras, monkeypatch):
+    monkeypatch.setattr(detection, 'SOURCE_IDLE_TIMEOUT', 0.2)
+
+    subscription = FrameSubscription()
+    source = subscription.source
+    camera = cameras[0]
+    subscription.close()
+
+    assert wait_until(lambda: camera.released)
+    assert not source.running
+    assert camera.reads == 0  # No subscribers, so nothing was captured
+
+
+def test_source_with_subscribers_stays_running(cameras, monkeypatch):
+    monkeypatch.setattr(detection, 'SOURCE_IDLE_TIMEOUT', 0.1)
+
+    subscription = FrameSubscription()
+    time.sleep(0.3)
+
+    assert subscription.source.running
+    assert not cameras[0].released
+    subscription.close()
+
+
+def test_restart_while_old_loop_is_exiting(cameras):
+    source = detection.get_frame_source()
+    source.subscribe(True)
+    old_camera = cameras[0]
+
+    # The old loop is stuck in read() when it's told to stop, so start()
+    # gives up waiting for it and opens the camera again
+    assert wait_until(lambda: old_camera.waiting)
+    source.stop()
+    assert source.start()
+    new_camera = cameras[1]
+    assert source.camera is new_camera
+
+    # Once the old loop gets its frame it must exit without stopping the
+    # restarted source, and release only its own camera
+    old_camera.allow()
+    assert wait_until(lambda: old_camera.released)
+    assert source.running
+    assert not new_camera.released
+
+    subscription = FrameSubscription(True)
+    new_camera.allow()
+    frame = subscription.next_frame()
+    assert frame is not None
+    assert new_camera.reads == 1
+    subscription.close()
+    source.unsubscribe(True)
+
+
+def test_stop_route_ends_open_streams(cameras):
+    cameras.free_running = True
+    app = Flask(__name__)
+    app.register_blueprint(detection_bp, url_prefix='/api/detection')
+    client = app.test_client()
+
+    response = client.get('/api/detection/video_feed')
+    stream = iter(response.response)
+    assert next(stream).startswith(b'--frame')
+
+    source = detection.frame_sources[0]
+    assert source.subscribers == {True: 1, False: 0}
+
+    # Drain the rest of the stream in the background, /stop should end it
+    drained = threading.Thread(target=lambda: list(stream), daemon=True)
+    drained.start()
+
+    response = client.get('/api/detection/stop')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+
+    drained.join(timeout=5.0)
+    assert not drained.is_alive()
+    assert wait_until(lambda: cameras[0].released)
+    assert source.subscribers == {True: 0, False: 0}
+    assert detection.detectors[0].recalibrations == 1
+
+
+def test_subscriber_skips_frames_without_its_variant(cameras):
+    with_mesh = FrameSubscription(True)
+    camera = cameras[0]
+    camera.allow()
+    assert with_mesh.next_frame()[0, 0, 0] == 255
+
+    # The latest frame was rendered before this subscriber joined, so it
+    # only has the mesh variant - next_frame() has to wait for the next one
+    without_mesh = FrameSubscription(False)
+    assert False not in without_mesh.source.frames
+    threading.Timer(0.2, camera.allow).start()
+
+    frame = without_mesh.next_frame()
+    assert frame is not None
+    assert frame[0, 0, 0] == 0
+    assert without_mesh.seq == 2
+
+    with_mesh.close()
+    without_mesh.close()
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from aiortc.mediastreams import MediaStreamError
+from av import VideoFrame
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from backend.extensions import limiter
+from backend.routes import detection
+from backend.routes.webrtc import DetectionTrack, webrtc_bp
+
+
+def test_track_subscribes_once_media_flows(cameras):
+    cameras.free_running = True
+    track = DetectionTrack(draw_mesh=False)
+
+    # Negotiating alone doesn't open the camera
+    assert track.subscription is None
+    assert not cameras
+
+    frame = asyncio.run(track.recv())
+    assert isinstance(frame, VideoFrame)
+    assert frame.to_ndarray(format='bgr24')[0, 0, 0] == 0
+
+    source = track.subscription.source
+    assert source.subscribers == {True: 0, False: 1}
+
+    track.stop()
+    assert source.subscribers == {True: 0, False: 0}
+
+
+def test_stopped_track_never_subscribes(cameras):
+    track = DetectionTrack()
+    track.stop()
+
+    with pytest.raises(MediaStreamError):
+        asyncio.run(track.recv())
+    assert track.subscription is None
+    assert not cameras
+
+
+def test_track_ends_when_detection_stops(cameras):
+    cameras.free_running = True
+    track = DetectionTrack()
+
+    async def stream():
+        await track.recv()
+        detection.stop_frame_sources()
+        await track.recv()
+
+    with pytest.raises(MediaStreamError):
+        asyncio.run(stream())
+
+    track.stop()
+    assert track.subscription.source.subscribers == {True: 0, False: 0}
+
+
+def test_offer_rejects_non_boolean_draw():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-for-the-offer-endpoint'
+    app.config['RATELIMIT_ENABLED'] = False
+    JWTManager(app)
+    limiter.init_app(app)
+    app.register_blueprint(webrtc_bp, url_prefix='/api/detection')
+
+    with app.app_context():
+        token = create_access_token(identity='user')
+
+    response = app.test_client().post(
+        '/api/detection/webrtc/offer',
+        json={'sdp': 'v=0', 'type': 'offer', 'draw': 'false'},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'